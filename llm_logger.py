@@ -1,11 +1,21 @@
 import sqlite3
 import json
 import logging
+import os
 import threading
-import queue
+import time
 import uuid
-from datetime import datetime
-from typing import Dict, Any, Union
+import weakref
+import zlib
+from collections import deque
+from itertools import chain
+from datetime import datetime, timezone
+from typing import Dict, Any, Optional, Union
+
+try:
+    import orjson
+except ImportError:  # optional, falls back to the stdlib json module
+    orjson = None
 
 # Configure logging
 logging.basicConfig(
@@ -14,99 +24,487 @@ logging.basicConfig(
     format='%(asctime)s %(levelname)s:%(message)s'
 )
 
+REQUIRED_REQUEST_KEYS = frozenset({"model", "messages"})
+REQUIRED_RESPONSE_KEYS = frozenset({"id", "object", "created", "model", "choices", "usage"})
+
+# Interactions are split into a small metadata table and a payload table so
+# scans over metadata don't page in the JSON bodies. Both share the same id.
+INSERT_META_PREFIX = """
+INSERT INTO interactions_meta (id,
+interaction_id,
+timestamp,
+model,
+prompt_tokens,
+completion_tokens,
+total_tokens)
+VALUES """
+META_ROW_PLACEHOLDERS = "(?, ?, ?, ?, ?, ?, ?)"
+
+INSERT_PAYLOAD_PREFIX = """
+INSERT INTO interactions_payload (id,
+request_data,
+response_data)
+VALUES """
+# JSON payloads may be bound as UTF-8 bytes (orjson output); the CAST stores
+# them as TEXT without a Python-side decode.
+PAYLOAD_ROW_PLACEHOLDERS = "(?, CAST(? AS TEXT), CAST(? AS TEXT))"
+
+NEXT_INTERACTION_ID_QUERY = "SELECT COALESCE(MAX(id), 0) + 1 FROM interactions_meta;"
+
+# Batches are split into multi-row INSERTs of these sizes only, so every
+# statement text is one of a few constants that stay in sqlite3's statement
+# cache. 7 columns x 100 rows stays well under SQLite's 999 parameter limit.
+INSERT_CHUNK_SIZES = (100, 10, 1)
+INSERT_META_QUERIES = {
+    size: INSERT_META_PREFIX + ", ".join([META_ROW_PLACEHOLDERS] * size) + ";"
+    for size in INSERT_CHUNK_SIZES
+}
+INSERT_PAYLOAD_QUERIES = {
+    size: INSERT_PAYLOAD_PREFIX + ", ".join([PAYLOAD_ROW_PLACEHOLDERS] * size) + ";"
+    for size in INSERT_CHUNK_SIZES
+}
+
+# WAL pages before SQLite checkpoints on its own (10000 x 8 KB is ~80 MB), and
+# rows written between explicit checkpoints that truncate the -wal file.
+WAL_AUTOCHECKPOINT_PAGES = 10000
+WAL_CHECKPOINT_INTERVAL = 10000
+
+# Errors that can be caused by a single row (constraint violations, values that
+# can't be bound), so a failed batch is worth retrying one row at a time.
+# Anything else (locked database, I/O errors, full disk) affects every row.
+ROW_SPECIFIC_ERRORS = (
+    sqlite3.IntegrityError,
+    sqlite3.InterfaceError,
+    sqlite3.ProgrammingError,
+    OverflowError,
+)
+
+# How long the interpreter-exit hook waits for each background thread to finish
+SHUTDOWN_TIMEOUT = 2.0
+
+
+def _shutdown_threads(stop_event, queue_events, logging_threads, error_thread, timeout=None):
+    """
+    Signals a logger's background threads to stop and waits for them to finish.
+    Kept at module level because a weakref.finalize callback must not reference
+    the object it finalizes.
+    """
+    stop_event.set()
+    for queue_event in queue_events:
+        queue_event.set()
+    for logging_thread in logging_threads:
+        logging_thread.join(timeout)
+    if error_thread is not None:
+        error_thread.join(timeout)
+
+
 class LLMLogger:
     """
     A thread-safe logger for storing LLM interactions and token usage in an SQLite database using a logging queue.
     """
 
-    def __init__(self, db_name: str = "llm_logs.db"):
+    def __init__(
+        self,
+        db_name: str = "llm_logs.db",
+        batch_size: int = 500,
+        log_errors: bool = True,
+        shards: int = 1
+    ):
         """
-        Initializes the logger by setting up the queue and starting the logging thread.
+        Initializes the logger by setting up the queues and starting the logging threads.
 
         :param db_name: Name of the SQLite database file.
+        :param batch_size: Maximum number of queued entries written per transaction.
+        :param log_errors: Whether errors are written to the error log file at all.
+        :param shards: Number of database files to spread writes across, each with
+            its own queue and logging thread. With more than one shard, files are
+            named after db_name with the shard index inserted, e.g. llm_logs.0.db.
         """
         self.db_name = db_name
-        self.log_queue = queue.Queue()
+        self.shards = max(1, shards)
+        if self.shards == 1:
+            self.db_names = [db_name]
+        else:
+            root, ext = os.path.splitext(db_name)
+            self.db_names = [f"{root}.{i}{ext}" for i in range(self.shards)]
+        self.batch_size = max(1, batch_size)
+        self.log_errors = log_errors
+        # Errors are buffered here and written out by error_thread, so failing
+        # calls don't contend on the logging module's locks and file I/O.
+        self.error_buffer = deque(maxlen=1024)
+        # deque append/popleft are atomic, so producers only take a lock when
+        # they need to wake a logging thread via its queue event.
+        self.log_queues = [deque() for _ in self.db_names]
+        self.queue_events = [threading.Event() for _ in self.db_names]
         self.stop_event = threading.Event()
-        self.logging_thread = threading.Thread(target=self._process_queue, daemon=True)
-        self.logging_thread.start()
+        self.logging_threads = [
+            threading.Thread(target=self._process_queue, args=shard, daemon=True)
+            for shard in zip(self.db_names, self.log_queues, self.queue_events)
+        ]
+        for logging_thread in self.logging_threads:
+            logging_thread.start()
+        # No error thread at all when error reporting is disabled
+        self.error_thread = None
+        if log_errors:
+            self.error_thread = threading.Thread(target=self._drain_errors, daemon=True)
+            self.error_thread.start()
+        # Runs at interpreter exit if close() wasn't called. The threads run bound
+        # methods and so keep this instance alive; an unclosed logger is never
+        # garbage collected while they are running.
+        self._finalizer = weakref.finalize(
+            self, _shutdown_threads, self.stop_event, self.queue_events,
+            self.logging_threads, self.error_thread, SHUTDOWN_TIMEOUT
+        )
+
+    def _report_error(self, message: str):
+        """
+        Buffers an error message for the error thread to write out.
+
+        :param message: The error message.
+        """
+        if self.log_errors:
+            self.error_buffer.append((time.time(), message))
+
+    def _flush_errors(self):
+        """
+        Writes all buffered error messages to the log, keeping their original timestamps.
+        """
+        root = logging.getLogger()
+        while self.error_buffer:
+            try:
+                created, message = self.error_buffer.popleft()
+            except IndexError:
+                break
+            if not root.isEnabledFor(logging.ERROR):
+                continue
+            root.handle(logging.makeLogRecord({
+                'name': root.name,
+                'levelno': logging.ERROR,
+                'levelname': logging.getLevelName(logging.ERROR),
+                'msg': message,
+                'created': created,
+                'msecs': (created - int(created)) * 1000,
+            }))
+
+    def _drain_errors(self):
+        """
+        Periodically flushes buffered error messages until the logger is closed,
+        then flushes whatever the logging threads reported while finishing.
+        """
+        while not self.stop_event.wait(1.0):
+            self._flush_errors()
+        for logging_thread in self.logging_threads:
+            logging_thread.join()
+        self._flush_errors()
+
+    def _configure_connection(self, conn):
+        """
+        Applies write-oriented PRAGMAs: 8 KB pages and memory-mapped I/O, WAL
+        journaling with synchronous=NORMAL and a matching autocheckpoint
+        threshold, in-memory temp storage and a larger page cache.
+        """
+        # page_size only takes effect on a database with no tables yet, and
+        # must be set before switching to WAL.
+        conn.execute("PRAGMA page_size=8192")
+        conn.execute("PRAGMA mmap_size=268435456")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA cache_size=-64000")
+
+        try:
+            row = conn.execute("PRAGMA journal_mode=WAL").fetchone()
+        except sqlite3.Error:
+            row = None
+        if not row or str(row[0]).lower() != "wal":
+            # In-memory and read-only databases cannot use WAL; keep their
+            # default journal mode and durability settings.
+            return
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA wal_autocheckpoint={WAL_AUTOCHECKPOINT_PAGES}")
 
     def _create_tables(self, conn):
         """
-        Creates the interactions and token_usage tables if they don't already exist.
+        Creates the interactions_meta and interactions_payload tables, and an
+        interactions view joining them, if they don't already exist. Databases
+        still using the single interactions table are migrated.
         """
-        create_interactions_table = """
-        CREATE TABLE IF NOT EXISTS interactions (
-            interaction_id TEXT PRIMARY KEY,
+        create_meta_table = """
+        CREATE TABLE IF NOT EXISTS interactions_meta (
+            id INTEGER PRIMARY KEY,
+            interaction_id TEXT NOT NULL UNIQUE,
             timestamp TEXT NOT NULL,
             model TEXT NOT NULL,
+            prompt_tokens INTEGER,
+            completion_tokens INTEGER,
+            total_tokens INTEGER
+        );
+        """
+
+        create_payload_table = """
+        CREATE TABLE IF NOT EXISTS interactions_payload (
+            id INTEGER PRIMARY KEY REFERENCES interactions_meta (id),
             request_data TEXT NOT NULL,
             response_data TEXT NOT NULL
         );
         """
 
+        create_interactions_view = """
+        CREATE VIEW IF NOT EXISTS interactions AS
+        SELECT m.id,
+            m.interaction_id,
+            m.timestamp,
+            m.model,
+            m.prompt_tokens,
+            m.completion_tokens,
+            m.total_tokens,
+            p.request_data,
+            p.response_data
+        FROM interactions_meta AS m
+        JOIN interactions_payload AS p ON p.id = m.id;
+        """
 
         try:
             cursor = conn.cursor()
-            cursor.execute(create_interactions_table)
-            conn.commit()
+            with conn:
+                cursor.execute("BEGIN IMMEDIATE")
+                cursor.execute(create_meta_table)
+                cursor.execute(create_payload_table)
+                legacy = cursor.execute(
+                    "SELECT type FROM sqlite_master WHERE name = 'interactions';"
+                ).fetchone()
+                if legacy and legacy[0] == "table":
+                    self._migrate_interactions_table(cursor)
+                cursor.execute(create_interactions_view)
         except sqlite3.Error as e:
-            logging.error(f"Failed to create tables: {e}")
+            self._report_error(f"Failed to create tables: {e}")
             raise
 
-    def _process_queue(self):
+    def _migrate_interactions_table(self, cursor):
+        """
+        Moves rows from the single interactions table used by earlier versions
+        into interactions_meta and interactions_payload, then drops it. Token
+        counts are filled in from each stored response's usage data where it
+        holds integers, and left NULL otherwise.
         """
-        Processes log entries from the queue and writes them to the database.
+        cursor.execute("""
+        INSERT INTO interactions_meta (id, interaction_id, timestamp, model,
+            prompt_tokens, completion_tokens, total_tokens)
+        SELECT rowid, interaction_id, timestamp, model,
+            CASE WHEN json_valid(response_data)
+                AND json_type(response_data, '$.usage.prompt_tokens') = 'integer'
+                THEN json_extract(response_data, '$.usage.prompt_tokens') END,
+            CASE WHEN json_valid(response_data)
+                AND json_type(response_data, '$.usage.completion_tokens') = 'integer'
+                THEN json_extract(response_data, '$.usage.completion_tokens') END,
+            CASE WHEN json_valid(response_data)
+                AND json_type(response_data, '$.usage.total_tokens') = 'integer'
+                THEN json_extract(response_data, '$.usage.total_tokens') END
+        FROM interactions;
+        """)
+        cursor.execute("""
+        INSERT INTO interactions_payload (id, request_data, response_data)
+        SELECT rowid, request_data, response_data FROM interactions;
+        """)
+        cursor.execute("DROP TABLE interactions;")
+
+    def _process_queue(self, db_name: str, log_queue: deque, queue_event: threading.Event):
+        """
+        Processes log entries from one shard's queue and writes them to its database.
+
+        :param db_name: Name of the shard's SQLite database file.
+        :param log_queue: The shard's queue of pending log entries.
+        :param queue_event: Event set by log() when entries are added to log_queue.
         """
         try:
             conn = sqlite3.connect(
-                self.db_name,
+                db_name,
                 check_same_thread=False,
                 detect_types=sqlite3.PARSE_DECLTYPES | sqlite3.PARSE_COLNAMES
             )
+            self._configure_connection(conn)
             self._create_tables(conn)
+            cursor = conn.cursor()
         except sqlite3.Error as e:
-            logging.error(f"Database connection failed: {e}")
+            self._report_error(f"Database connection failed: {e}")
             return
 
-        while not self.stop_event.is_set() or not self.log_queue.empty():
+        try:
+            rows_since_checkpoint = 0
+            while not self.stop_event.is_set() or log_queue:
+                if not log_queue:
+                    queue_event.wait(1)
+                    queue_event.clear()
+                    continue  # Check for stop_event and new entries again
+
+                # Drain whatever is already waiting so it shares one transaction,
+                # stopping early at a flush() marker
+                batch = []
+                flush_marker = None
+                while len(batch) < self.batch_size:
+                    try:
+                        log_entry = log_queue.popleft()
+                    except IndexError:
+                        break
+                    if isinstance(log_entry, threading.Event):
+                        flush_marker = log_entry
+                        break
+                    batch.append(log_entry)
+
+                try:
+                    self._write_batch(conn, cursor, batch)
+                except Exception as e:
+                    # Never let one bad batch stop this shard's writer thread
+                    self._report_error(f"Unexpected error logging interactions: {e!r}")
+
+                if flush_marker is not None:
+                    flush_marker.set()
+
+                # Automatic checkpoints never shrink the -wal file, so truncate it
+                # periodically to keep a long-running logger's WAL bounded.
+                rows_since_checkpoint += len(batch)
+                if rows_since_checkpoint >= WAL_CHECKPOINT_INTERVAL:
+                    rows_since_checkpoint = 0
+                    try:
+                        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+                    except sqlite3.Error as e:
+                        self._report_error(f"WAL checkpoint failed: {e}")
+        finally:
+            conn.close()
+
+    def _write_batch(self, conn, cursor, batch):
+        """
+        Writes a batch of log entries to the database inside a single transaction.
+
+        If the batch fails because of a single row (e.g. a duplicate interaction_id
+        or a value that can't be bound), the transaction is rolled back and the
+        entries are retried one by one so the bad row does not drop the rest of
+        the batch. Any other error is reported once and the batch is dropped,
+        since retrying row by row would only hit it again for every entry.
+        """
+        rows = []
+        for log_entry in batch:
+            # Serialization happens here rather than in log() so callers
+            # don't pay for it on their own thread.
             try:
-                log_entry = self.log_queue.get(timeout=1)
-            except queue.Empty:
-                continue  # Check for stop_event again
-
-            insert_interaction_query = """
-            INSERT INTO interactions (interaction_id,
-            timestamp,
-            model,
-            request_data,
-            response_data)
-            VALUES (?, ?, ?, ?, ?);
-            """
+                request_json = self._to_json(log_entry['request_data'])
+                response_json = self._to_json(log_entry['response_data'])
+            except Exception as e:
+                # Includes RecursionError from deeply nested payloads
+                self._report_error(f"Error serializing data to JSON: {e!r}")
+                continue
+            # Stored as naive UTC ISO 8601, matching existing rows
+            timestamp = datetime.fromtimestamp(log_entry['timestamp'], timezone.utc).replace(tzinfo=None)
+            usage = log_entry['token_usage']
+            if not isinstance(usage, dict):
+                usage = {}
+            rows.append((
+                log_entry['interaction_id'],
+                timestamp.isoformat(),
+                log_entry['model'],
+                self._token_count(usage.get('prompt_tokens', 0)),
+                self._token_count(usage.get('completion_tokens', 0)),
+                self._token_count(usage.get('total_tokens', 0)),
+                request_json,
+                response_json
+            ))
+
+        if not rows:
+            return
 
+        # The connection context manager commits on success and rolls back on
+        # any exception; BEGIN IMMEDIATE takes the write lock up front so the
+        # ids assigned in _insert_rows can't race another writer.
+        try:
+            with conn:
+                cursor.execute("BEGIN IMMEDIATE")
+                self._insert_rows(cursor, rows)
+            return
+        except ROW_SPECIFIC_ERRORS as e:
+            if len(rows) == 1:
+                self._report_row_error(e)
+                return
+        except Exception as e:
+            self._report_batch_error(e, len(rows))
+            return
+
+        for index, row in enumerate(rows):
             try:
-                cursor = conn.cursor()
-                
-                # Insert into interactions table
-                cursor.execute(insert_interaction_query, (
-                    log_entry['interaction_id'],
-                    log_entry['timestamp'],
-                    log_entry['model'],
-                    log_entry['request_data'],
-                    log_entry['response_data']
-                ))
-
-                conn.commit()
-            except sqlite3.IntegrityError as e:
-                logging.error(f"Integrity error logging interaction: {e}")
-            except sqlite3.Error as e:
-                logging.error(f"Database error logging interaction: {e}")
+                with conn:
+                    cursor.execute("BEGIN IMMEDIATE")
+                    self._insert_rows(cursor, [row])
+            except ROW_SPECIFIC_ERRORS as e:
+                self._report_row_error(e)
             except Exception as e:
-                logging.error(f"Unexpected error logging interaction: {e}")
-            finally:
-                self.log_queue.task_done()
+                self._report_batch_error(e, len(rows) - index)
+                return
 
-        conn.close()
+    def _report_batch_error(self, error: Exception, count: int):
+        """
+        Reports an error that prevented a whole batch from being written.
+
+        :param error: The exception raised while writing.
+        :param count: The number of interactions that were dropped.
+        """
+        if isinstance(error, sqlite3.Error):
+            self._report_error(f"Database error logging interactions, dropped {count}: {error}")
+        else:
+            self._report_error(f"Unexpected error logging interactions, dropped {count}: {error}")
+
+    def _report_row_error(self, error: Exception):
+        """
+        Reports why a single interaction could not be written.
+
+        :param error: The exception raised while inserting the row.
+        """
+        if isinstance(error, sqlite3.IntegrityError):
+            self._report_error(f"Integrity error logging interaction: {error}")
+        elif isinstance(error, sqlite3.Error):
+            self._report_error(f"Database error logging interaction: {error}")
+        else:
+            self._report_error(f"Unexpected error logging interaction: {error}")
+
+    def _token_count(self, value: Any) -> Optional[int]:
+        """
+        Converts a token count from the response's usage data to an int.
+
+        :param value: The reported count.
+        :return: The count as an int, or None if it can't be stored as one.
+        """
+        try:
+            count = int(value)
+        except (TypeError, ValueError, OverflowError):
+            return None
+        # SQLite integers are signed 64-bit
+        if not -2 ** 63 <= count < 2 ** 63:
+            return None
+        return count
+
+    def _insert_rows(self, cursor, rows):
+        """
+        Inserts rows into interactions_meta and interactions_payload. Must be
+        called inside a write transaction so the ids assigned here stay free.
+        """
+        first_id = cursor.execute(NEXT_INTERACTION_ID_QUERY).fetchone()[0]
+        meta_rows = []
+        payload_rows = []
+        for offset, row in enumerate(rows):
+            row_id = first_id + offset
+            meta_rows.append((row_id,) + row[:-2])
+            payload_rows.append((row_id,) + row[-2:])
+
+        self._insert_chunked(cursor, INSERT_META_QUERIES, meta_rows)
+        self._insert_chunked(cursor, INSERT_PAYLOAD_QUERIES, payload_rows)
+
+    def _insert_chunked(self, cursor, queries, rows):
+        """
+        Inserts rows using the multi-row statements in queries, keyed by the
+        chunk sizes in INSERT_CHUNK_SIZES.
+        """
+        start = 0
+        for size in INSERT_CHUNK_SIZES:
+            while len(rows) - start >= size:
+                chunk = rows[start:start + size]
+                cursor.execute(queries[size], list(chain.from_iterable(chunk)))
+                start += size
 
     def _ensure_dict(self, data: Union[Dict[str, Any], str]) -> Dict[str, Any]:
         """
@@ -114,18 +512,40 @@ class LLMLogger:
 
         :param data: The data to ensure is a dictionary.
         :return: The data as a dictionary.
-        :raises ValueError: If data is a string that cannot be parsed as JSON.
+        :raises ValueError: If data is a string that cannot be parsed as a JSON object.
         """
         if isinstance(data, str):
             try:
-                return json.loads(data)
+                parsed = json.loads(data)
             except json.JSONDecodeError as e:
                 raise ValueError(f"String input is not valid JSON: {e}")
+            if not isinstance(parsed, dict):
+                raise ValueError(f"String input is not a JSON object: got {type(parsed).__name__}")
+            return parsed
         elif isinstance(data, dict):
             return data
         else:
             raise TypeError("Data must be a dictionary or a JSON-formatted string.")
 
+    def _to_json(self, data: Union[Dict[str, Any], str]) -> Union[str, bytes]:
+        """
+        Serializes a dictionary to JSON, using orjson when it is installed.
+        Strings are assumed to be JSON already and are returned unchanged.
+
+        :param data: The data to serialize.
+        :return: The JSON as a string, or as UTF-8 bytes when produced by orjson.
+        """
+        if isinstance(data, str):
+            return data
+        if orjson is not None:
+            try:
+                return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+            except TypeError:
+                # orjson is stricter than json (e.g. integers beyond 64 bits);
+                # let the stdlib have a go before giving up on the entry.
+                pass
+        return json.dumps(data)
+
     def validate_interaction(self, request: Dict[str, Any], response: Dict[str, Any]) -> bool:
         """
         Validates the structure of request and response data.
@@ -134,18 +554,15 @@ class LLMLogger:
         :param response: The response data as a dictionary.
         :return: True if valid, False otherwise.
         """
-        required_request_keys = ["model", "messages"]
-        required_response_keys = ["id", "object", "created", "model", "choices", "usage"]
-
-        for key in required_request_keys:
-            if key not in request:
-                logging.error(f"Missing key in request: {key}")
-                return False
+        missing = REQUIRED_REQUEST_KEYS - request.keys()
+        if missing:
+            self._report_error(f"Missing key in request: {', '.join(sorted(missing))}")
+            return False
 
-        for key in required_response_keys:
-            if key not in response:
-                logging.error(f"Missing key in response: {key}")
-                return False
+        missing = REQUIRED_RESPONSE_KEYS - response.keys()
+        if missing:
+            self._report_error(f"Missing key in response: {', '.join(sorted(missing))}")
+            return False
 
         return True
 
@@ -157,68 +574,118 @@ class LLMLogger:
         """
         Logs a single interaction of request and response by enqueueing it.
 
+        Dictionaries are serialized later on the logging thread, so they should
+        not be mutated after being passed in.
+
         :param request: The request data as a dictionary or JSON string.
         :param response: The response data as a dictionary or JSON string.
         """
-        try:
-            request_dict = self._ensure_dict(request)
-            response_dict = self._ensure_dict(response)
-        except (ValueError, TypeError) as e:
-            logging.error(f"Error processing input data: {e}")
-            return
+        # Fast path for the common case of two dicts that already have every
+        # required key; anything else goes through parsing and validation.
+        if (type(request) is dict and type(response) is dict
+                and request.keys() >= REQUIRED_REQUEST_KEYS
+                and response.keys() >= REQUIRED_RESPONSE_KEYS):
+            request_dict = request
+            response_dict = response
+        else:
+            try:
+                request_dict = self._ensure_dict(request)
+                response_dict = self._ensure_dict(response)
+            except (ValueError, TypeError) as e:
+                self._report_error(f"Error processing input data: {e}")
+                return
 
-        # Validate interaction
-        if not self.validate_interaction(request_dict, response_dict):
-            logging.error("Invalid interaction data. Skipping logging.")
-            return
+            # Validate interaction
+            if not self.validate_interaction(request_dict, response_dict):
+                self._report_error("Invalid interaction data. Skipping logging.")
+                return
 
         # Generate a unique interaction ID
-        interaction_id = response_dict.get("id") or str(uuid.uuid4())
+        interaction_id = response_dict.get("id") or uuid.uuid4().hex
 
         # Extract model name from response
         model = response_dict.get("model")
         if not model:
-            logging.error("Model name not found in response. Skipping logging.")
+            self._report_error("Model name not found in response. Skipping logging.")
             return
 
-        timestamp = datetime.utcnow().isoformat()
-
-        # Serialize request and response data to JSON
-        try:
-            request_json = json.dumps(request_dict)
-            response_json = json.dumps(response_dict)
-        except (TypeError, OverflowError) as e:
-            logging.error(f"Error serializing data to JSON: {e}")
-            return
+        # Formatted to ISO 8601 on the logging thread
+        timestamp = time.time()
 
         # Extract token usage details
         usage = response_dict.get("usage", {})
 
-        # Prepare the log entry
+        # Prepare the log entry. Request and response are kept as given (dict or
+        # JSON string) and serialized by the logging thread.
         log_entry = {
             'interaction_id': interaction_id,
             'timestamp': timestamp,
             'model': model,
-            'request_data': request_json,
-            'response_data': response_json,
+            'request_data': request,
+            'response_data': response,
             'token_usage': usage
         }
 
-        # Enqueue the log entry
-        self.log_queue.put(log_entry)
+        # Enqueue the log entry on its shard and wake that logging thread if it is idle
+        if self.shards == 1:
+            shard = 0
+        else:
+            # crc32 rather than hash() so an id maps to the same shard in every process
+            shard = zlib.crc32(str(interaction_id).encode("utf-8")) % self.shards
+        self.log_queues[shard].append(log_entry)
+        queue_event = self.queue_events[shard]
+        if not queue_event.is_set():
+            queue_event.set()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Waits until every interaction logged before this call has been processed
+        by the logging threads, without closing the logger.
 
-    def close(self):
+        :param timeout: Maximum number of seconds to wait, or None to wait indefinitely.
+        :return: True if all pending entries were processed, False on timeout or
+            if a logging thread is no longer running.
         """
-        Signals the logging thread to terminate and waits for it to finish.
+        deadline = None if timeout is None else time.monotonic() + timeout
+        markers = []
+        for log_queue, queue_event in zip(self.log_queues, self.queue_events):
+            # The logging thread sets the marker once it has written
+            # everything queued ahead of it.
+            marker = threading.Event()
+            log_queue.append(marker)
+            queue_event.set()
+            markers.append(marker)
+
+        for marker, logging_thread in zip(markers, self.logging_threads):
+            while not marker.wait(0.1):
+                if not logging_thread.is_alive():
+                    return False
+                if deadline is not None and time.monotonic() >= deadline:
+                    return False
+        return True
+
+    def connect_shards(self) -> sqlite3.Connection:
         """
-        self.stop_event.set()
-        self.logging_thread.join()
+        Opens a connection for reading across all shards. Every shard is attached
+        and a temporary all_interactions view combines their interactions views
+        with UNION ALL. SQLite attaches at most 10 databases by default.
 
-    def __del__(self):
+        :return: A connection to the first shard with the others attached.
         """
-        Ensures the logging thread is properly terminated when the instance is destroyed.
+        conn = sqlite3.connect(self.db_names[0])
+        selects = ["SELECT * FROM main.interactions"]
+        for i, shard_name in enumerate(self.db_names[1:], start=1):
+            conn.execute("ATTACH DATABASE ? AS ?;", (shard_name, f"shard{i}"))
+            selects.append(f"SELECT * FROM shard{i}.interactions")
+        conn.execute(f"CREATE TEMP VIEW all_interactions AS {' UNION ALL '.join(selects)};")
+        return conn
+
+    def close(self):
         """
-        try:
-            self.close()
-        except:
-            pass
\ No newline at end of file
+        Signals the logging threads to terminate and waits for them to finish.
+
+        The background threads keep the logger alive, so a logger that is simply
+        dropped keeps running until close() is called or the interpreter exits.
+        """
+        self._finalizer.detach()
+        _shutdown_threads(self.stop_event, self.queue_events, self.logging_threads, self.error_thread)
@@ -3,6 +3,9 @@ setup(
     name='llm_logger',
     version='0.1.2',
     py_modules=['llm_logger'],
+    extras_require={
+        'fast': ['orjson'],
+    },
     description='A simple logger for Requests/Responses from LLMs',
     author='Corianas',
     author_email='corana@gmail.com',